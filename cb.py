@@ -1,29 +1,32 @@
 #!/usr/bin/env python3
 
 import argparse
-from PIL import Image
+import io
 import pyperclip
 import os
 import sys
-import tempfile
 import subprocess
 import shutil
-import tiktoken
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 __VERSION__ = "v1.0-4-ged68b6e"
 
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.bmp', '.gif'})
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_MODES = frozenset({"1", "L", "LA", "P", "RGB", "RGBA", "I"})
+
+@lru_cache(maxsize=None)
 def is_xclip_installed():
     return shutil.which("xclip") is not None
 
+@lru_cache(maxsize=None)
 def is_xsel_installed():
     return shutil.which("xsel") is not None
 
 def is_pyperclip_installed():
-    try:
-        import pyperclip
-        return True
-    except ImportError:
-        return False
+    # pyperclip is imported unconditionally at the top, so reaching here means it's present
+    return True
 
 def check_dependencies():
     missing_dependencies = []
@@ -42,21 +45,56 @@ def install_dependencies():
     for dep in dependencies:
         print(f"- {dep}")
 
+@lru_cache(maxsize=4)
+def _get_enc(encoding_name):
+    # Imported lazily: tiktoken is slow to load and only needed for -t
+    import tiktoken
+    return tiktoken.get_encoding(encoding_name)
+
+# Special-token strings such as <|endoftext|> are counted as plain text
+# rather than rejected, since we only want the length of the input
+def count_tokens(text, encoding_name):
+    encoding = _get_enc(encoding_name)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def count_tokens_batch(texts, encoding_name):
+    encoding = _get_enc(encoding_name)
+    token_lists = encoding.encode_batch(texts, num_threads=min(8, os.cpu_count() or 1, len(texts)), disallowed_special=())
+    return [len(tokens) for tokens in token_lists]
+
+def read_text_file(file_path):
+    try:
+        with open(file_path, 'rb') as file:
+            text = file.read().decode('utf-8', errors='replace')
+    except FileNotFoundError:
+        return None
+
+    # Match text-mode universal newlines so files agree with STDIN input
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text.rstrip()
+
 def copy_file_contents_to_clipboard(file_contents_list, include_header=False, discord_attachment=False, file_paths=None, debug=False):
     try:
-        combined_contents = ""
+        parts = []
         for i, file_contents in enumerate(file_contents_list):
+            header = ""
             if include_header and file_paths:
                 header = f"=== File: {file_paths[i]} ===\n"
-                file_contents = header + file_contents
 
             if discord_attachment and file_paths:
-                file_contents = f"[Attached file: {file_paths[i]}\nContent:\n```\n{file_contents}\n```\n]"
-
-            combined_contents += file_contents + "\n"
+                parts.append(f"[Attached file: {file_paths[i]}\nContent:\n```\n{header}")
+                parts.append(file_contents)
+                parts.append("\n```\n]")
+            else:
+                parts.append(header)
+                parts.append(file_contents)
+            parts.append("\n")
             if debug:
-                print(f"Debug: Combined contents so far:\n{combined_contents}")  # Debug print
+                source = file_paths[i] if file_paths else "STDIN"
+                print(f"Debug: Appended {source} ({len(file_contents)} chars)")  # Debug print
 
+        combined_contents = "".join(parts)
         pyperclip.copy(combined_contents)
         if debug:
             print(f"Debug: Final combined contents copied to clipboard:\n{combined_contents}")  # Debug print
@@ -65,6 +103,46 @@ def copy_file_contents_to_clipboard(file_contents_list, include_header=False, di
         print(f"Error: An unexpected error occurred. {str(e)}")
         return None
 
+def copy_image_to_clipboard(image_path):
+    try:
+        with open(image_path, 'rb') as file:
+            data = file.read()
+
+        # Anything that isn't already a PNG gets decoded and re-encoded
+        if data.startswith(PNG_SIGNATURE):
+            png_data = data
+        else:
+            from PIL import Image
+            image = Image.open(io.BytesIO(data))
+            # Image.open leaves animated GIFs on their first frame, which is the
+            # one we copy. Palette and other PNG-native modes are saved as-is.
+            if image.mode not in PNG_MODES:
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+            buffer = io.BytesIO()
+            # The PNG only lives as long as the clipboard, so favour speed over size
+            image.save(buffer, format="PNG", optimize=False, compress_level=1)
+            png_data = buffer.getvalue()
+
+        # xclip forks to serve the selection, so don't hand it pipes it could hold open
+        result = subprocess.run(["xclip", "-selection", "clipboard", "-t", "image/png"],
+                                input=png_data, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if result.returncode != 0:
+            print(f"Error: xclip failed to copy '{image_path}' to the clipboard.")
+            return False
+
+        print(f"Image '{image_path}' copied to the clipboard successfully!")
+        return True
+    except FileNotFoundError as e:
+        if e.filename == "xclip":
+            print("Error: xclip is required to copy images to the clipboard.")
+        else:
+            print(f"Error: File '{image_path}' not found.")
+        return False
+    except Exception as e:
+        print(f"Error: An unexpected error occurred. {str(e)}")
+        return False
+
 def main():
     parser = argparse.ArgumentParser(description="Copy file contents or images to clipboard.")
     parser.add_argument("--version", action="store_true", help="Display the application version.")
@@ -108,33 +186,36 @@ def main():
             if args.export:
                 print("Exported contents:\n" + combined_contents)
     else:
-        file_contents_list = []
-        valid_file_paths = []
+        text_file_paths = []
         for file_path in args.file_paths:
             if args.debug:
                 print(f"Processing file: {file_path}")  # Debug print
-            if file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
+            if os.path.splitext(file_path)[1].lower() in IMAGE_EXTENSIONS:
                 copy_successful = copy_image_to_clipboard(file_path)
                 if not copy_successful:
                     return
             else:
-                try:
-                    with open(file_path, 'r') as file:
-                        file_content = file.read().strip()
-                        file_contents_list.append(file_content)
-                        valid_file_paths.append(file_path)
-                        if args.debug:
-                            print(f"Debug: Appended contents of {file_path}")  # Debug print
-                except FileNotFoundError:
+                text_file_paths.append(file_path)
+
+        file_contents_list = []
+        valid_file_paths = []
+        if text_file_paths:
+            # Reads release the GIL, so overlapping them hides per-file open/read latency
+            with ThreadPoolExecutor(max_workers=min(32, len(text_file_paths))) as executor:
+                results = list(executor.map(read_text_file, text_file_paths))
+
+            for file_path, file_content in zip(text_file_paths, results):
+                if file_content is None:
                     print(f"Error: File '{file_path}' not found.")
                     continue
-
-        if args.token:
-            for file_content, file_path in zip(file_contents_list, valid_file_paths):
-                token_count = count_tokens(file_content, encoding)
-                print(f'{file_path} contains {token_count} tokens.')
+                file_contents_list.append(file_content)
+                valid_file_paths.append(file_path)
 
         if file_contents_list:
+            if args.token:
+                token_counts = count_tokens_batch(file_contents_list, encoding)
+                for file_path, token_count in zip(valid_file_paths, token_counts):
+                    print(f'{file_path} contains {token_count} tokens.')
             combined_contents = copy_file_contents_to_clipboard(file_contents_list, args.header, args.attachment, valid_file_paths, debug=args.debug)
             if combined_contents:
                 print(f"All files copied to the clipboard successfully!")